@@ -18,6 +18,7 @@ from .oep_client import (
     DEFAULT_BATCH_SIZE,
     DEFAULT_HOST,
     DEFAULT_INSERT_RETRIES,
+    DEFAULT_MAX_WORKERS,
     DEFAULT_PROTOCOL,
     DEFAULT_SCHEMA,
     TOKEN_ENV_VAR,
@@ -37,6 +38,7 @@ __all__ = [
     "DEFAULT_BATCH_SIZE",
     "DEFAULT_HOST",
     "DEFAULT_INSERT_RETRIES",
+    "DEFAULT_MAX_WORKERS",
     "DEFAULT_PROTOCOL",
     "DEFAULT_SCHEMA",
     "TOKEN_ENV_VAR",
@@ -3,9 +3,7 @@
 
 __version__ = "0.17.0"
 
-import json
 import logging
-import os
 import sys
 
 import click
@@ -16,6 +14,7 @@ from oep_client.oep_client import (
     DEFAULT_BATCH_SIZE,
     DEFAULT_HOST,
     DEFAULT_INSERT_RETRIES,
+    DEFAULT_MAX_WORKERS,
     DEFAULT_PROTOCOL,
     DEFAULT_SCHEMA,
     TOKEN_ENV_VAR,
@@ -23,19 +22,20 @@ from oep_client.oep_client import (
 )
 from oep_client.test import TestRoundtrip
 from oep_client.utils import (
-    dataframe_to_records,
+    DEFAULT_ENCODING,
     get_schema_definition_from_metadata,
-    read_dataframe,
+    iter_records,
+    json_dumps,
     read_metadata_json,
     records_to_dataframe,
     write_dataframe,
     write_json,
+    write_records_csv,
 )
 
 PROG_NAME = "oep-client"
 LOGGING_DATE_FMT = "%Y-%m-%d %H:%M:%S"
 LOGGING_FMT = "[%(asctime)s.%(msecs)03d %(levelname)7s] %(message)s"
-DEFAULT_ENCODING = "utf-8"
 
 
 @click.group()
@@ -47,39 +47,24 @@ DEFAULT_ENCODING = "utf-8"
     default="info",
     type=click.Choice(["debug", "info", "warning", "error"]),
 )
-@click.option("--token", "-t")
+@click.option("--token", "-t", envvar=TOKEN_ENV_VAR)
 @click.option("--protocol", default=DEFAULT_PROTOCOL)
 @click.option("--host", default=DEFAULT_HOST)
 @click.option("--api-version", default=DEFAULT_API_VERSION)
-@click.option("--schema", "-s", default=DEFAULT_SCHEMA)
+@click.option("--schema", "-s", "default_schema", default=DEFAULT_SCHEMA)
 @click.option("--batch-size", "-b", default=DEFAULT_BATCH_SIZE)
 @click.option("--insert-retries", default=DEFAULT_INSERT_RETRIES)
-def main(
-    ctx,
-    loglevel,
-    token,
-    protocol,
-    host,
-    api_version,
-    schema,
-    batch_size,
-    insert_retries,
-):
+@click.option("--max-workers", default=DEFAULT_MAX_WORKERS)
+@click.option("--compress", is_flag=True, help="gzip large request payloads")
+@click.option(
+    "--transport", default="requests", type=click.Choice(["requests", "httpx"])
+)
+def main(ctx, loglevel, **client_options):
     loglevel = getattr(logging, loglevel.upper())
     logging.basicConfig(format=LOGGING_FMT, datefmt=LOGGING_DATE_FMT, level=loglevel)
     ctx.ensure_object(dict)
-
-    token = token or os.environ.get(TOKEN_ENV_VAR)
-
-    ctx.obj["client"] = OepClient(
-        token=token,
-        protocol=protocol,
-        host=host,
-        api_version=api_version,
-        default_schema=schema,
-        batch_size=batch_size,
-        insert_retries=insert_retries,
-    )
+    # option names match the arguments of OepClient
+    ctx.obj["client"] = OepClient(**client_options)
 
 
 @main.command("create")
@@ -115,11 +100,23 @@ def drop_table(ctx, table):
 @click.option("--encoding", "-e", default=DEFAULT_ENCODING)
 @click.option("--sheet", "-s", default=None)
 @click.option("--delimiter", "-d", default=",")
-def insert_into_table(ctx, table, data_file, encoding, sheet, delimiter):
-    df = read_dataframe(data_file, encoding=encoding, sheet=sheet, delimiter=delimiter)
-    data = dataframe_to_records(df)
+@click.option("--usecols", "-u", multiple=True, help="only read these columns (csv)")
+def insert_into_table(ctx, table, data_file, encoding, sheet, delimiter, usecols):
     client = ctx.obj["client"]
-    client.insert_into_table(table, data)
+    # read and upload file in chunks, each is uploaded in concurrent batches.
+    # without batches (batch size 0), the whole file is read at once
+    chunksize = None
+    if client.batch_size and client.batch_size > 0:
+        chunksize = client.batch_size * client.max_workers
+    for data in iter_records(
+        data_file,
+        chunksize,
+        encoding=encoding,
+        sheet=sheet,
+        delimiter=delimiter,
+        usecols=usecols or None,
+    ):
+        client.insert_into_table(table, data)
     logging.info("OK")
 
 
@@ -132,15 +129,26 @@ def insert_into_table(ctx, table, data_file, encoding, sheet, delimiter):
 @click.option("--delimiter", "-d", default=",")
 def select_from_table(ctx, table, data_file, where, sheet, delimiter):
     client = ctx.obj["client"]
-    data = client.select_from_table(table, where=where)
-    if data_file:
+    if data_file and data_file.endswith(".json"):
+        # records are already json: no need for a DataFrame
+        data = client.select_from_table(table, where=where)
+        write_json(data, data_file, encoding=DEFAULT_ENCODING)
+    elif data_file and data_file.endswith(".csv"):
+        # write rows while the data is downloaded
+        data = client.iter_select_from_table(table, where=where)
+        write_records_csv(
+            data, data_file, encoding=DEFAULT_ENCODING, delimiter=delimiter
+        )
+    elif data_file:
+        # parse the data while it is downloaded (the DataFrame needs all rows)
+        data = client.iter_select_from_table(table, where=where)
         df = records_to_dataframe(data)
         write_dataframe(df, data_file, sheet=sheet, delimiter=delimiter)
     else:
+        data = client.select_from_table(table, where=where)
         # print to stdout
-        datas = json.dumps(data, ensure_ascii=False, indent=2)
-        datab = datas.encode()
-        sys.stdout.buffer.write(datab)
+        sys.stdout.buffer.write(json_dumps(data, indent=True))
+        sys.stdout.buffer.write(b"\n")
 
     logging.info("OK")
 
@@ -163,9 +171,8 @@ def get_metadata(ctx, table, metadata_file, encoding):
         write_json(metadata, metadata_file, encoding=encoding)
     else:
         # print to stdout
-        datas = json.dumps(metadata, ensure_ascii=False, indent=2)
-        datab = datas.encode()
-        sys.stdout.buffer.write(datab)
+        sys.stdout.buffer.write(json_dumps(metadata, indent=True))
+        sys.stdout.buffer.write(b"\n")
 
     logging.info("OK")
 
@@ -1,9 +1,28 @@
 """Work in Progress - requires sqlalchemy and oedialect
 """
 
+import functools
 import os
 
 
+@functools.lru_cache(maxsize=8)
+def get_engine(protocol, host, token=None):
+    """Create sqlalchemy engine (cached, creating it is expensive).
+
+    NOTE: oedialect reads the protocol from the environment variable
+    OEDIALECT_PROTOCOL, which has to be set before every use of the engine.
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import sqlalchemy as sa
+
+    if token:
+        connection_string = "postgresql+oedialect://:%s@%s" % (token, host)
+    else:
+        connection_string = "postgresql+oedialect://%s" % (host,)
+
+    return sa.create_engine(connection_string)
+
+
 def get_sqlalchemy_table(oepclient, table, schema=None):
     """
     Args:
@@ -13,17 +32,9 @@ def get_sqlalchemy_table(oepclient, table, schema=None):
     # NOTE: import inside of function because it's not mandatory
     import sqlalchemy as sa
 
+    # NOTE: also for cached engines (another protocol may have been set since)
     os.environ["OEDIALECT_PROTOCOL"] = oepclient.protocol
-
-    if oepclient.token:
-        connection_string = "postgresql+oedialect://:%s@%s" % (
-            oepclient.token,
-            oepclient.host,
-        )
-    else:
-        connection_string = "postgresql+oedialect://%s" % (oepclient.host,)
-
-    engine = sa.create_engine(connection_string)
+    engine = get_engine(oepclient.protocol, oepclient.host, oepclient.token)
     metadata = sa.MetaData(bind=engine)
     schema = schema or oepclient.default_schema
 
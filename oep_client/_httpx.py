@@ -0,0 +1,79 @@
+"""Optional HTTP/2 transport - requires httpx (with http2 extra)
+"""
+
+import contextlib
+import io
+
+
+class _IteratorReader(io.RawIOBase):
+    """Readable file object on top of an iterator of bytes"""
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._iterator)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class HttpxSession:
+    """Minimal stand-in for requests.Session, as far as OepClient uses it.
+
+    All requests are multiplexed over HTTP/2 connections.
+    """
+
+    def __init__(self, headers=None, max_connections=None):
+        """
+        Args:
+            headers(dict, optional): default headers for all requests
+            max_connections(int, optional): size of the connection pool
+        """
+        # NOTE: import inside of function because it's not mandatory
+        import httpx
+
+        self.client = httpx.Client(
+            http2=True,
+            headers=headers,
+            timeout=None,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    @contextlib.contextmanager
+    def request(self, method, url, data=None, headers=None, stream=False):
+        """Send a request.
+
+        Args:
+            method(str): http method
+            url(str): request url
+            data(bytes, optional): request body
+            headers(dict, optional): additional headers
+            stream(bool, optional): if True, do not read the body, but
+                provide it as file object in `raw` (like requests does)
+
+        Returns:
+            context manager that yields the httpx.Response
+        """
+        with self.client.stream(method, url, content=data, headers=headers) as res:
+            if stream and res.is_success:
+                res.raw = io.BufferedReader(_IteratorReader(res.iter_bytes()))
+            else:
+                # NOTE: also read error messages of streamed requests
+                res.read()
+            yield res
+
+    def close(self):
+        self.client.close()
@@ -1,21 +1,22 @@
 import logging
 
-import pandas as pd
-
 from .exceptions import OepClientSideException
-from .utils import dataframe_to_records
+from .utils import dataframe_to_fields_values, get_fields_values, is_dataframe
 
 
 class AdvancedApiSession:
     """Context for advanced api session (close connection on exit)"""
 
-    def __init__(self, oepclient):
+    def __init__(self, oepclient, read_only=False):
         """
         Args:
 
             oepclient(OEPClient)
+            read_only(bool, optional): if True, do not commit on exit
+                (saves a request, closing the connection discards the transaction)
         """
         self.oepclient = oepclient
+        self.read_only = read_only
         self.api_url = self.oepclient.api_url + "advanced/"
         self.connection_id = None
         self.cursor_id = None
@@ -34,6 +35,23 @@ class AdvancedApiSession:
         return res
 
     def __enter__(self):
+        return self.open()
+
+    def __exit__(self, _exc_type, exc_val, _exc_tb):
+        # rollback on error, otherwise commit
+        if exc_val:
+            logging.error(exc_val)
+            self.rollback()
+        elif not self.read_only:
+            self.commit()
+        self.close()
+
+    def open(self):
+        """Open connection and cursor.
+
+        Returns:
+            self
+        """
         self.connection_id = self._command("connection/open")["content"][
             "connection_id"
         ]
@@ -41,13 +59,16 @@ class AdvancedApiSession:
         logging.debug("Started connection: %s", self.connection_id)
         return self
 
-    def __exit__(self, _exc_type, exc_val, _exc_tb):
-        # rollback on error, otherwise commit
-        if exc_val:
-            logging.error(exc_val)
-            self._command("connection/rollback")
-        else:
-            self._command("connection/commit")
+    def commit(self):
+        """Commit the current transaction (the connection stays open)."""
+        self._command("connection/commit")
+
+    def rollback(self):
+        """Rollback the current transaction (the connection stays open)."""
+        self._command("connection/rollback")
+
+    def close(self):
+        """Close cursor and connection (without commit)."""
         if self.cursor_id:
             self._command("cursor/close")
             logging.debug("Closed cursor: %s", self.cursor_id)
@@ -72,17 +93,19 @@ class AdvancedApiSession:
             schema(str, optional): table schema name.
                 defaults to self.default_schema which is usually "model_draft"
         """
-        if isinstance(data, pd.DataFrame):
-            data = dataframe_to_records(data)
-
-        if not isinstance(data, (list, tuple)) or (
+        if is_dataframe(data):
+            fields, values = dataframe_to_fields_values(data)
+        elif not isinstance(data, (list, tuple)) or (
             data and not isinstance(data[0], dict)
         ):
             raise OepClientSideException(
                 "data must be list or tuple of record dictionaries"
             )
+        else:
+            fields, values = get_fields_values(data)
 
-        query = self._get_query(table, schema=schema, values=data)
+        # send column names only once instead of in every record
+        query = self._get_query(table, schema=schema, fields=fields, values=values)
         return self._command("insert", query)
 
     def select_from_table(self, table, schema=None):
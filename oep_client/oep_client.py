@@ -24,16 +24,20 @@ cli.drop_table(table)
 
 """  # noqa
 
+import contextlib
 import functools
-import json
+import gzip
+import inspect
 import logging
-import math
+import queue
+import random
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import click
-import pandas as pd
-import requests
 
+from ._httpx import HttpxSession
 from .advanced_api import AdvancedApiSession
 
 # from .dialect import get_sqlalchemy_table
@@ -44,7 +48,15 @@ from .exceptions import (
     OepTableAlreadyExistsException,
     OepTableNotFoundException,
 )
-from .utils import dataframe_to_records, fix_table_definition
+from .utils import (
+    create_session,
+    dataframe_to_records,
+    fix_name,
+    fix_table_definition,
+    is_dataframe,
+    json_dumps,
+    json_loads,
+)
 
 DEFAULT_HOST = "openenergyplatform.org"
 DEFAULT_PROTOCOL = "https"
@@ -52,11 +64,30 @@ DEFAULT_API_VERSION = "v0"
 DEFAULT_SCHEMA = "model_draft"
 DEFAULT_BATCH_SIZE = 5000
 DEFAULT_INSERT_RETRIES = 10
+INSERT_RETRY_BACKOFF = 0.5  # seconds, doubled for every retry
+INSERT_RETRY_MAX_DELAY = 10  # seconds
+DEFAULT_MAX_WORKERS = 8
+COMPRESS_MIN_SIZE = 4096  # bytes
+QUERY_PREFIX = b'{"query":'
+QUERY_SUFFIX = b"}"
 TOKEN_ENV_VAR = "OEP_API_TOKEN"
 
+# postgres data types as reported by the api => data types for table definition
+DATA_TYPE_ALIASES = {"DOUBLE PRECISION": "FLOAT"}
+DATA_TYPES_WITH_LENGTH = {"CHARACTER": "CHAR(%d)", "CHARACTER VARYING": "VARCHAR(%d)"}
+# information_schema reports "YES"/"NO"
+IS_NULLABLE_VALUES = {"YES": True, "NO": False}
+# constraint definitions as reported by the api
+PRIMARY_KEY_PATTERN = re.compile(r"^PRIMARY KEY \((?P<field>[^)]+)\)$")
+FOREIGN_KEY_PATTERN = re.compile(
+    r"^FOREIGN KEY \((?P<field>[^)]+)\) REFERENCES (?P<ref_schema>[^.]+)\.(?P<ref_table>[^()]+)\((?P<ref_field>[^)]+)\)$"  # noqa
+)
+UNIQUE_PATTERN = re.compile(r"^UNIQUE \((?P<fields>[^)]+)\)$")
+
 
 def check_exception(pattern, exception):
     """create decorator for custom Exceptions."""
+    regex = re.compile(".*" + pattern, re.IGNORECASE)
 
     def decorator(fun):
         @functools.wraps(fun)
@@ -65,11 +96,22 @@ def check_exception(pattern, exception):
                 return fun(*args, **kwargs)
             except Exception as exc:
                 msg = str(exc)
-                if re.match(".*" + pattern, msg, re.IGNORECASE):
+                if regex.match(msg):
+                    raise exception(msg)
+                raise
+
+        @functools.wraps(fun)
+        def _gen(*args, **kwargs):
+            # generators only raise while they are consumed
+            try:
+                yield from fun(*args, **kwargs)
+            except Exception as exc:
+                msg = str(exc)
+                if regex.match(msg):
                     raise exception(msg)
                 raise
 
-        return _fun
+        return _gen if inspect.isgeneratorfunction(fun) else _fun
 
     return decorator
 
@@ -86,6 +128,9 @@ class OepClient:
         default_schema=DEFAULT_SCHEMA,
         batch_size=DEFAULT_BATCH_SIZE,
         insert_retries=DEFAULT_INSERT_RETRIES,
+        max_workers=DEFAULT_MAX_WORKERS,
+        compress=False,
+        transport="requests",
     ):
         """
         Args:
@@ -102,9 +147,18 @@ class OepClient:
                if 0 or None: do not use batches
             insert_retries(int, optional): number of insert_retries for insert
                on OepServerSideExceptions
+            max_workers(int, optional): number of batches that will be uploaded
+               concurrently. Also the size of the http connection pool.
+            compress(bool, optional): gzip request payloads larger than
+               COMPRESS_MIN_SIZE. The server must accept `Content-Encoding: gzip`
+            transport(str, optional):
+                * 'requests' (default): HTTP/1.1 with connection pool
+                * 'httpx': HTTP/2, concurrent requests share connections.
+                  requires package `httpx[http2]`
         """
         self.headers = {"Authorization": "Token %s" % token} if token else {}
         self.api_url = "%s://%s/api/%s/" % (protocol, host, api_version)
+        self.schema_api_url = self.api_url + "schema/"
         self.web_url = "%s://%s/dataedit/view/" % (protocol, host)
         self.protocol = protocol
         self.host = host
@@ -112,6 +166,31 @@ class OepClient:
         self.default_schema = default_schema
         self.batch_size = batch_size
         self.insert_retries = insert_retries
+        self.max_workers = max_workers or 1
+        self.compress = compress
+        # (schema, table) => table definition, used for the checks before inserts
+        self._table_definitions = {}
+
+        # keep connections alive between requests
+        if transport == "requests":
+            self.session = create_session(pool_maxsize=self.max_workers)
+            self.session.headers.update(self.headers)
+        elif transport == "httpx":
+            self.session = HttpxSession(
+                headers=self.headers, max_connections=self.max_workers
+            )
+        else:
+            raise NotImplementedError(transport)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exc_type, _exc_val, _exc_tb):
+        self.close()
+
+    def close(self):
+        """Close all open connections of the client."""
+        self.session.close()
 
     def _get_table_api_url(self, table, schema=None):
         """Return base api url for table.
@@ -123,7 +202,7 @@ class OepClient:
                 defaults to self.default_schema which is usually "model_draft"
         """
         schema = schema or self.default_schema
-        url = self.api_url + "schema/%s/tables/%s/" % (schema, table)
+        url = f"{self.schema_api_url}{schema}/tables/{table}/"
         logging.debug("URL: %s", url)
         return url
 
@@ -141,8 +220,7 @@ class OepClient:
         logging.debug("URL: %s", url)
         return url
 
-    @check_exception("invalid token", OepAuthenticationException)
-    def _request(self, method, url, expected_status, jsondata=None):
+    def _request(self, method, url, expected_status, jsondata=None, jsonbody=None):
         """Send a request and perform basic check for results
 
         Args:
@@ -152,19 +230,73 @@ class OepClient:
                 if result has a different code, an error will be raised
             jsondata(object, optional): payload that will be send as json
                 in the request.
+            jsonbody(bytes, optional): already serialized json payload
+                (instead of jsondata)
         Returns:
             result object from returned json data
         """
-        res = requests.request(
-            url=url, method=method, json=jsondata, headers=self.headers
-        )
-        logging.debug("%d %s %s", res.status_code, method, url)
-        try:
-            res_json = res.json()
-        except json.decoder.JSONDecodeError:
-            # api should return json, but some actions don't,
-            # and 500 errors obviously also don't
+        headers = {}
+        body = jsonbody
+        if jsondata is not None:
+            # serialize ourselves: faster than requests' json=
+            body = json_dumps(jsondata)
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            if self.compress and len(body) > COMPRESS_MIN_SIZE:
+                # json rows are very redundant, fast level is good enough
+                body = gzip.compress(body, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        # close response right away so the connection goes back into the pool
+        with self.session.request(
+            url=url, method=method, data=body, headers=headers
+        ) as res:
+            logging.debug("%d %s %s", res.status_code, method, url)
+            return self._get_response_json(res, expected_status)
+
+    @contextlib.contextmanager
+    def _request_stream(self, method, url, expected_status):
+        """Send a request, but do not read the response body yet.
+
+        Args:
+            method(str): http method, that will be passed on to `requests.request`
+            url(str): request url
+            expected_status(int): expected http status code.
+                if result has a different code, an error will be raised
+        Returns:
+            context manager that yields the (unread) response
+        """
+        with self.session.request(url=url, method=method, stream=True) as res:
+            logging.debug("%d %s %s", res.status_code, method, url)
+            if res.status_code != expected_status:
+                # read error message and raise
+                self._get_response_json(res, expected_status)
+            if hasattr(res.raw, "decode_content"):
+                # let urllib3 undo gzip transfer encoding
+                res.raw.decode_content = True
+            yield res
+
+    @check_exception("invalid token", OepAuthenticationException)
+    def _get_response_json(self, res, expected_status):
+        """Check the status code and return parsed json data
+
+        Args:
+            res(requests.Response): response
+            expected_status(int): expected http status code.
+                if result has a different code, an error will be raised
+        Returns:
+            result object from returned json data
+        """
+        content = res.content
+        if not content:
+            # e.g. 204, nothing to parse
             res_json = {}
+        else:
+            try:
+                res_json = json_loads(content)
+            except ValueError:  # JSONDecodeError of whichever json library is used
+                # api should return json, but some actions don't,
+                # and 500 errors obviously also don't
+                res_json = {}
         if res.status_code >= 500:
             raise OepServerSideException(res_json)
         elif res.status_code >= 400:
@@ -208,7 +340,8 @@ class OepClient:
         logging.debug(definition)
         self._request("PUT", url, 201, {"query": definition})
         # to check: return schema of newlycreated table
-        definition_final = self.get_table_definition(table=table, schema=schema)
+        self.invalidate_table_definition(table, schema=schema)
+        definition_final = self._get_cached_table_definition(table, schema=schema)
         logging.debug(definition_final)
 
     # inconsistent message from server:
@@ -224,6 +357,7 @@ class OepClient:
                 defaults to self.default_schema which is usually "model_draft"
         """
         url = self._get_table_api_url(table=table, schema=schema)
+        self.invalidate_table_definition(table, schema=schema)
         return self._request("DELETE", url, 200)
 
     @check_exception("not found", OepTableNotFoundException)
@@ -241,6 +375,50 @@ class OepClient:
         Returns:
             list of records(dict: column_name -> value)
         """
+        url = self._get_select_url(table=table, schema=schema, where=where)
+        res = self._request("GET", url, 200)
+        return res
+
+    @check_exception("not found", OepTableNotFoundException)
+    def iter_select_from_table(self, table, schema=None, where=None):
+        """Iterate over rows from table.
+
+        If ijson is installed, the response is parsed while it is downloaded,
+        so the complete json text is never held in memory.
+
+        Args:
+            table(str): table name. Must be valid postgres table name,
+                all lowercase, only letters, numbers and underscore
+            schema(str, optional): table schema name.
+                defaults to self.default_schema which is usually "model_draft"
+            where(list, optional): filter criteria in form of field/operator/value,
+                e.g. ["id>10"]
+
+        Yields:
+            records(dict: column_name -> value)
+        """
+        try:
+            # NOTE: import inside of function because it's not mandatory
+            import ijson
+        except ImportError:
+            yield from self.select_from_table(table, schema=schema, where=where)
+            return
+
+        url = self._get_select_url(table=table, schema=schema, where=where)
+        with self._request_stream("GET", url, 200) as res:
+            yield from ijson.items(res.raw, "item", use_float=True)
+
+    def _get_select_url(self, table, schema=None, where=None):
+        """Return api url to select rows from table.
+
+        Args:
+            table(str): table name. Must be valid postgres table name,
+                all lowercase, only letters, numbers and underscore
+            schema(str, optional): table schema name.
+                defaults to self.default_schema which is usually "model_draft"
+            where(list, optional): filter criteria in form of field/operator/value,
+                e.g. ["id>10"]
+        """
         url = self._get_table_api_url(table=table, schema=schema) + "rows/"
 
         if where:
@@ -248,96 +426,194 @@ class OepClient:
             where = "&".join(f"where={w}" for w in where)
             url = f"{url}?{where}"
 
-        res = self._request("GET", url, 200)
-        return res
+        return url
 
     # inconsistent message from server:
     # "do not have permission" when table does not exist
     @check_exception("do not have permission", OepTableNotFoundException)
     def insert_into_table(
-        self, table, data, schema=None, batch_size=None, method="api"
+        self,
+        table,
+        data,
+        schema=None,
+        batch_size=None,
+        method="api",
+        return_count=False,
     ):
         """Insert records into table.
 
         Args:
             table(str): table name. Must be valid postgres table name,
                 all lowercase, only letters, numbers and underscore
-            data(list): list of records(dict: column_name -> value)
+            data(list|DataFrame): list of records(dict: column_name -> value)
+                or DataFrame
             schema(str, optional): table schema name.
                 defaults to self.default_schema which is usually "model_draft"
             batch_size(int, optional): defaults to client's default batch size
             method(list, optional):
                 * 'api': sent records via regular API
                 * 'advanced' (default): sent records via advanced API
+            return_count(bool, optional): if True, query the number of rows
+                in the table after the upload (requires a full table scan)
+
+        Returns:
+            number of rows sent or, if return_count, number of rows in table
         """
 
-        table_def = self.get_table_definition(table, schema=schema)
-        column_names = [c["name"] for c in table_def["columns"]]
+        table_def = self._get_cached_table_definition(table, schema=schema)
+        column_names = {c["name"] for c in table_def["columns"]}
 
-        if isinstance(data, pd.DataFrame):
-            used_column_names = set(data.columns)
-            data = dataframe_to_records(data)
+        if is_dataframe(data):
+            used_column_names = set(fix_name(c) for c in data.columns)
+            # the advanced api takes column names and row values:
+            # batches stay DataFrames and are converted without records
+            if method != "advanced":
+                data = dataframe_to_records(data)
         else:
-            used_column_names = set()
-            for row in data:
-                used_column_names = used_column_names | set(row.keys())
+            # union of all keys in one pass (no new set per row)
+            used_column_names = set().union(*data)
 
-        # FIXME: on oep server: columns are determined by keys in first row!
-        # for now, we have to fix at least the first row
-        if data and set(data[0]) < used_column_names:
-            for c in used_column_names - set(data[0]):
-                data[0][c] = None
+            # FIXME: on oep server: columns are determined by keys in first row!
+            # for now, we have to fix at least the first row
+            if data and data[0].keys() < used_column_names:
+                for c in used_column_names - data[0].keys():
+                    data[0][c] = None
 
-        unknown_column_names = used_column_names - set(column_names)
+        unknown_column_names = used_column_names - column_names
         if unknown_column_names:
             raise OepClientSideException(
                 "Columns not in table: %s", unknown_column_names
             )
 
         batch_size = batch_size or self.batch_size
-        n_batches = math.ceil(len(data) / batch_size)
-        data_batches = []
-        for i in range(n_batches):
-            i_from = i * batch_size
-            i_to = (i + 1) * batch_size
-            data_batches.append(data[i_from:i_to])
-
-        n_items = 0
-        with click.progressbar(data_batches) as data_parts:
-            for i_item, data_part in enumerate(data_parts):
-                logging.debug(
-                    "Starting upload batch %d/%d (%d/%d)...",
-                    i_item + 1,
-                    n_batches,
-                    n_items,
-                    len(data),
-                )
-                try_number = 0
-                success = False
-                while try_number <= self.insert_retries:
-                    try_number += 1
-                    try:
-                        if method == "api":
-                            self._insert_into_table_api(table, data_part, schema)
-                        elif method == "advanced":
-                            with AdvancedApiSession(self) as ses:
-                                ses.insert_into_table(table, data_part, schema)
-                        else:
-                            raise NotImplementedError(method)
-                        # batch upload ok
-                        success = True
-                        break
-                    except OepServerSideException:
-                        if try_number <= self.insert_retries:
-                            # FIXME ???
-                            logging.debug("A server side error occurred. retrying...")
-
-                if not success:
-                    raise OepServerSideException()
-
-                n_items += len(data_part)
-
-        return self.count_rows(table=table, schema=schema)
+        if not batch_size or batch_size < 0:
+            # do not use batches
+            batch_size = len(data) or 1
+        n_batches = (len(data) + batch_size - 1) // batch_size
+        rows = data.iloc if is_dataframe(data) else data
+
+        # batches are independent requests: upload them concurrently.
+        # batches are only sliced when they are submitted, and only a few more
+        # than max_workers are pending at a time, to keep memory usage low
+        max_pending = 2 * self.max_workers
+        progress = click.progressbar(length=n_batches)
+        pending = set()
+        # open advanced api sessions are reused by later batches,
+        # so at most one session per worker is created
+        session_pool = queue.SimpleQueue()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor, progress:
+                try:
+                    for i_item, i_from in enumerate(range(0, len(data), batch_size)):
+                        if len(pending) >= max_pending:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+                                progress.update(1)
+                        future = executor.submit(
+                            self._insert_into_table_batch,
+                            table,
+                            rows[i_from : i_from + batch_size],
+                            schema,
+                            method,
+                            i_item,
+                            n_batches,
+                            session_pool,
+                        )
+                        pending.add(future)
+                    for future in as_completed(pending):
+                        future.result()
+                        progress.update(1)
+                except Exception:
+                    # do not start any more batches
+                    for future in pending:
+                        future.cancel()
+                    raise
+
+            if not return_count:
+                return len(data)
+            # count in one of the sessions that are still open from the upload
+            try:
+                ses = session_pool.get_nowait()
+            except queue.Empty:
+                return self.count_rows(table=table, schema=schema)
+            session_pool.put(ses)
+            return self.count_rows(table=table, schema=schema, session=ses)
+        finally:
+            while not session_pool.empty():
+                session_pool.get_nowait().close()
+
+    def _insert_into_table_batch(
+        self, table, data, schema, method, i_item, n_batches, session_pool
+    ):
+        """Insert one batch of records, retry on OepServerSideExceptions.
+
+        Args:
+            table(str): table name
+            data(list): list of records(dict: column_name -> value)
+            schema(str): table schema name
+            method(str): 'api' or 'advanced'
+            i_item(int): index of the batch (for logging)
+            n_batches(int): total number of batches (for logging)
+            session_pool(queue.SimpleQueue): open AdvancedApiSession objects
+                that are not in use
+        """
+        logging.debug("Starting upload batch %d/%d...", i_item + 1, n_batches)
+        for try_number in range(self.insert_retries + 1):
+            if try_number:
+                # exponential backoff (like urllib3 Retry), give the server time.
+                # jitter: concurrent batches that failed together do not all
+                # retry at the same moment
+                delay = min(
+                    INSERT_RETRY_BACKOFF * 2 ** (try_number - 1), INSERT_RETRY_MAX_DELAY
+                ) + random.uniform(0, INSERT_RETRY_BACKOFF)
+                logging.debug("A server side error occurred. retrying in %.2fs", delay)
+                time.sleep(delay)
+            try:
+                if method == "api":
+                    self._insert_into_table_api(table, data, schema)
+                elif method == "advanced":
+                    self._insert_into_table_advanced(table, data, schema, session_pool)
+                else:
+                    raise NotImplementedError(method)
+                # batch upload ok
+                return
+            except OepServerSideException as exc:
+                error = exc
+
+        raise error
+
+    def _insert_into_table_advanced(self, table, data, schema, session_pool):
+        """Insert records into table via advanced API, one transaction per batch.
+
+        Args:
+            table(str): table name
+            data(list|DataFrame): list of records(dict: column_name -> value)
+            schema(str): table schema name
+            session_pool(queue.SimpleQueue): open AdvancedApiSession objects
+                that are not in use
+        """
+        try:
+            ses = session_pool.get_nowait()
+        except queue.Empty:
+            ses = AdvancedApiSession(self).open()
+        try:
+            ses.insert_into_table(table, data, schema)
+            ses.commit()
+        except Exception:
+            # after the rollback, the connection can be reused (e.g. for the retry).
+            # if the rollback fails, the session is dropped
+            try:
+                ses.rollback()
+            except Exception as exc:
+                logging.warning("Rollback failed, closing session: %s", exc)
+                # best effort: the original error is raised in any case
+                with contextlib.suppress(Exception):
+                    ses.close()
+            else:
+                session_pool.put(ses)
+            raise
+        session_pool.put(ses)
 
     def _insert_into_table_api(self, table, data, schema):
         """Insert records into table.
@@ -354,7 +630,10 @@ class OepClient:
             return {}
 
         url = self._get_table_api_url(table=table, schema=schema) + "rows/new"
-        res = self._request("POST", url, 201, {"query": data})
+        # the api requires {"query": [...]}: wrap the serialized records
+        # instead of building a wrapper object around every batch
+        body = QUERY_PREFIX + json_dumps(data) + QUERY_SUFFIX
+        res = self._request("POST", url, 201, jsonbody=body)
         return res
 
     @check_exception("not found", OepTableNotFoundException)
@@ -381,16 +660,11 @@ class OepClient:
             const_type = const["constraint_type"]
             const_def = const["definition"]
             if const_type == "PRIMARY KEY":
-                args = re.match(
-                    r"^PRIMARY KEY \((?P<field>[^)]+)\)$", const_def
-                ).groupdict()
+                args = PRIMARY_KEY_PATTERN.match(const_def).groupdict()
                 # NOTE currently only single field PK allowed
                 res["columns"][args["field"]]["primary_key"] = True
             elif const_type == "FOREIGN KEY":
-                args = re.match(
-                    r"^FOREIGN KEY \((?P<field>[^)]+)\) REFERENCES (?P<ref_schema>[^.]+)\.(?P<ref_table>[^()]+)\((?P<ref_field>[^)]+)\)$",  # noqa
-                    const_def,
-                ).groupdict()
+                args = FOREIGN_KEY_PATTERN.match(const_def).groupdict()
                 # NOTE currently only single field PK allowed
                 res["columns"][args["field"]]["foreign_key"] = [
                     {
@@ -400,9 +674,7 @@ class OepClient:
                     }
                 ]
             elif const_type == "UNIQUE":
-                args = re.match(
-                    r"^UNIQUE \((?P<fields>[^)]+)\)$", const_def
-                ).groupdict()
+                args = UNIQUE_PATTERN.match(const_def).groupdict()
                 columns = [f.strip() for f in args["fields"].split(",")]
                 definition["constraints"].append(
                     {"constraint_type": "UNIQUE", "columns": columns}
@@ -410,12 +682,10 @@ class OepClient:
 
         def get_datatype(coldef):
             dt = coldef["data_type"].upper()
-            if dt == "CHARACTER":
-                dt = "CHAR(%d)" % coldef["character_maximum_length"]
-            elif dt == "CHARACTER VARYING":
-                dt = "VARCHAR(%d)" % coldef["character_maximum_length"]
-            elif dt == "DOUBLE PRECISION":
-                dt = "FLOAT"
+            if dt in DATA_TYPES_WITH_LENGTH:
+                dt = DATA_TYPES_WITH_LENGTH[dt] % coldef["character_maximum_length"]
+            else:
+                dt = DATA_TYPE_ALIASES.get(dt, dt)
 
             if (coldef["column_default"] or "").startswith("nextval"):
                 if "INT" not in dt:
@@ -432,7 +702,9 @@ class OepClient:
             col = {
                 "name": name,
                 "data_type": get_datatype(coldef),
-                "is_nullable": coldef["is_nullable"],
+                "is_nullable": IS_NULLABLE_VALUES.get(
+                    coldef["is_nullable"], coldef["is_nullable"]
+                ),
             }
             if coldef.get("primary_key", False):
                 col["primary_key"] = True
@@ -442,6 +714,33 @@ class OepClient:
 
         return definition
 
+    def _get_cached_table_definition(self, table, schema=None):
+        """Like get_table_definition, but only requested once per table."""
+        key = (schema or self.default_schema, table)
+        if key not in self._table_definitions:
+            definition = self.get_table_definition(table, schema=schema)
+            self._table_definitions[key] = definition
+        return self._table_definitions[key]
+
+    def invalidate_table_definition(self, table, schema=None):
+        """Remove table definition from cache, e.g. if the table has been
+        changed by another client.
+
+        Args:
+            table(str): table name. Must be valid postgres table name,
+                all lowercase, only letters, numbers and underscore
+
+            schema(str, optional): table schema name.
+                defaults to self.default_schema which is usually "model_draft"
+        """
+        self._table_definitions.pop((schema or self.default_schema, table), None)
+
+    def clear_table_definitions(self):
+        """Remove all table definitions from cache, e.g. if tables have been
+        changed by another client.
+        """
+        self._table_definitions.clear()
+
     def table_exists(self, table, schema=None):
         """True or False
 
@@ -507,17 +806,30 @@ class OepClient:
         url = self._get_table_api_url(table=table, schema=schema) + "meta/"
         metadata = self.validate_metadata(table, metadata)
         self._request("POST", url, 200, metadata)
-        return self.get_metadata(table=table, schema=schema)
+        # table existence is already checked, just read back the metadata
+        return self._request("GET", url, 200)
 
     def validate_metadata(self, table, data):
         if "id" not in data:
             data["id"] = table
         return data
 
-    def advanced_session(self):
-        return AdvancedApiSession(self)
+    def advanced_session(self, read_only=False):
+        return AdvancedApiSession(self, read_only=read_only)
+
+    def count_rows(self, table, schema=None, session=None):
+        """Count rows in table.
+
+        Args:
+            table(str): table name
+            schema(str, optional): table schema name.
+                defaults to self.default_schema which is usually "model_draft"
+            session(AdvancedApiSession, optional): open session to use,
+                otherwise a new one is opened
 
-    def count_rows(self, table, schema=None):
+        Returns:
+            number of rows
+        """
         schema = schema or self.default_schema
         query = {
             "type": "select",
@@ -539,17 +851,18 @@ class OepClient:
                 }
             ],
         }
-        with self.advanced_session() as sas:
-            # not data yet
-            res = sas._command("search", query)
-            content = res["content"]
-            description = content["description"]
-            fieldnames = [f[0] for f in description]
-            res = sas._command("cursor/fetch_one")
-            content = res["content"]
-            rec = dict(zip(fieldnames, content))
-            rowcount = rec["rowcount"]
-        return rowcount
+        if session is None:
+            with self.advanced_session(read_only=True) as sas:
+                return self.count_rows(table, schema=schema, session=sas)
+        # not data yet
+        res = session._command("search", query)
+        content = res["content"]
+        description = content["description"]
+        fieldnames = [f[0] for f in description]
+        res = session._command("cursor/fetch_one")
+        content = res["content"]
+        rec = dict(zip(fieldnames, content))
+        return rec["rowcount"]
 
     def move_table(self, table, target_schema, schema=None):
         """Move table into new target schema"""
@@ -557,6 +870,7 @@ class OepClient:
             self._get_table_api_url(table=table, schema=schema)
             + "move/%s/" % target_schema
         )
+        self.invalidate_table_definition(table, schema=schema)
         return self._request("POST", url, 200)
 
     # def get_sqlalchemy_table(self, table, schema=None):
@@ -581,16 +895,20 @@ class OepClient:
         schemas = self._request("post", url, expected_status=200)["content"]
         url = adv.api_url + "get_table_names"
 
-        for schema in schemas:
-            if schema.startswith("_") or schema in [
-                "topology",
-                "test",
-                "sandbox",
-                "information_schema",
-            ]:
-                continue
-            tables = self._request(
+        schemas = [
+            schema
+            for schema in schemas
+            if not schema.startswith("_")
+            and schema not in ["topology", "test", "sandbox", "information_schema"]
+        ]
+
+        def get_table_names(schema):
+            return self._request(
                 "post", url, jsondata={"query": {"schema": schema}}, expected_status=200
             )["content"]
-            for table in tables:
-                yield {"schema": schema, "table": table}
+
+        # one request per schema: send them concurrently (results stay in order)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for schema, tables in zip(schemas, executor.map(get_table_names, schemas)):
+                for table in tables:
+                    yield {"schema": schema, "table": table}
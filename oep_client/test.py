@@ -1,15 +1,28 @@
 # coding: utf-8
-import json
 import logging
 import os
-import random
+import subprocess
+import sys
+import tempfile
 import unittest
+import uuid
+from unittest import mock
+
+from click.testing import CliRunner
 
 from . import TOKEN_ENV_VAR, OepClient
-from .exceptions import OepClientSideException
+from .exceptions import OepClientSideException, OepServerSideException
+from .utils import (
+    dataframe_to_records,
+    fix_column_definition,
+    fix_name,
+    iter_records,
+    read_dataframe,
+    records_to_dataframe,
+    write_csv,
+)
 
 SCHEMA = "sandbox"
-MAX_TRIES_FIND_RANDOM_TEST_TABLE = 10
 
 
 TEST_TABLE_DEFINITION = {
@@ -68,20 +81,14 @@ class TestRoundtrip(unittest.TestCase):
             {"field1": "k3", "field2": 3},
         ]
 
-        # create a random test table name that does not exist
-        tries_left = MAX_TRIES_FIND_RANDOM_TEST_TABLE
-        while tries_left:
-            table_name = "test_table_%s" % random.randint(0, 1000000000)
-            if not client.table_exists(table_name, schema=schema):
-                break
-            if not tries_left:
-                raise Exception(
-                    "Could not create a random test table name after %d tries"
-                    % MAX_TRIES_FIND_RANDOM_TEST_TABLE
-                )
+        # random test table name: collisions are practically impossible
+        # (and create_table would fail anyway)
+        table_name = "test_table_%s" % uuid.uuid4().hex
         tdef = client.create_table(table_name, TEST_TABLE_DEFINITION, schema=schema)
         logging.info(tdef)
-        rcount = client.insert_into_table(table_name, test_data, schema=schema)
+        rcount = client.insert_into_table(
+            table_name, test_data, schema=schema, return_count=True
+        )
 
         # insert second time should fail because unique constraint
         self.assertRaises(
@@ -98,10 +105,8 @@ class TestRoundtrip(unittest.TestCase):
         for row in data:
             del row["id"]
 
-        # test equality
-        self.assertEqual(
-            json.dumps(test_data, sort_keys=True), json.dumps(data, sort_keys=True)
-        )
+        # test equality (dicts compare equal regardless of key order)
+        self.assertEqual(test_data, data)
 
         # also test where
         data_partial = client.select_from_table(
@@ -124,3 +129,213 @@ class TestUtils(unittest.TestCase):
         self.assertTrue(
             all(set(["schema", "table"]) == set(x) for x in self.client.iter_tables())
         )
+
+    def test_fix_name(self):
+        # results are cached: other tests may have called it already
+        fix_name.cache_clear()
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(fix_name("Test Name-2"), "test_name_2")
+        # cached
+        fix_name.cache_clear()
+        self.assertEqual(fix_name("test_name_2"), "test_name_2")
+        self.assertEqual(fix_name("test_name_2"), "test_name_2")
+        self.assertEqual(fix_name.cache_info().hits, 1)
+
+    def test_fix_column_definition(self):
+        for data_type, expected in [
+            ("string", "varchar"),
+            ("Double Precision", "float"),
+            ("varchar(128)", "varchar(128)"),
+            ("bigint", "bigint"),
+        ]:
+            coldef = fix_column_definition({"name": "x", "type": data_type})
+            self.assertEqual(coldef, {"name": "x", "data_type": expected})
+
+    def test_cli_insert_without_batches(self):
+        # NOTE: import here, the cli module imports this module
+        from .__main__ import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "data.csv")
+            with open(filepath, "w", encoding="utf-8") as file:
+                file.write("field1,field2\na,1\nb,2\nc,3\n")
+            with mock.patch.object(OepClient, "insert_into_table") as insert:
+                result = CliRunner().invoke(
+                    main, ["--batch-size", "0", "insert", "test_table", filepath]
+                )
+        self.assertEqual(result.exit_code, 0, result.output)
+        # all rows in one call
+        self.assertEqual(insert.call_count, 1)
+        self.assertEqual(len(insert.call_args[0][1]), 3)
+
+    def _insert_advanced(self, commands, data, fail_inserts=0, fail_rollbacks=0):
+        """Insert via mocked advanced api.
+
+        Args:
+            commands(list): requests are appended as (command, connection_id)
+            fail_inserts(int): number of inserts that fail
+            fail_rollbacks(int): number of rollbacks that fail
+        """
+        client = OepClient(max_workers=1, insert_retries=1)
+        counts = {"connections": 0, "inserts": 0, "rollbacks": 0}
+
+        def request(method, url, expected_status, jsondata=None, jsonbody=None):
+            command = url.split("/advanced/")[1]
+            commands.append((command, jsondata.get("connection_id")))
+            if command == "connection/open":
+                counts["connections"] += 1
+                return {"content": {"connection_id": counts["connections"]}}
+            if command == "cursor/open":
+                return {"content": {"cursor_id": counts["connections"]}}
+            if command == "insert":
+                counts["inserts"] += 1
+                if counts["inserts"] <= fail_inserts:
+                    raise OepServerSideException("insert failed")
+            if command == "connection/rollback":
+                counts["rollbacks"] += 1
+                if counts["rollbacks"] <= fail_rollbacks:
+                    raise OepServerSideException("rollback failed")
+            return {}
+
+        with mock.patch.object(
+            client,
+            "_get_cached_table_definition",
+            return_value=TEST_TABLE_DEFINITION,
+        ), mock.patch.object(client, "_request", side_effect=request), mock.patch(
+            "oep_client.oep_client.INSERT_RETRY_BACKOFF", 0
+        ):
+            client.insert_into_table(
+                "test_table", data, batch_size=1, method="advanced"
+            )
+
+    def test_insert_advanced_retry(self):
+        data = [{"field1": "a", "field2": 1}, {"field1": "b", "field2": 2}]
+        commands = []
+        self._insert_advanced(commands, data, fail_inserts=1)
+        # rollback and retry in the same session, which is reused for all batches
+        self.assertEqual(
+            commands,
+            [
+                ("connection/open", None),
+                ("cursor/open", 1),
+                ("insert", 1),
+                ("connection/rollback", 1),
+                ("insert", 1),
+                ("connection/commit", 1),
+                ("insert", 1),
+                ("connection/commit", 1),
+                ("cursor/close", 1),
+                ("connection/close", 1),
+            ],
+        )
+
+    def test_insert_advanced_rollback_failed(self):
+        data = [{"field1": "a", "field2": 1}]
+        commands = []
+        # the original error is raised, not the one from the failed rollback
+        with self.assertRaisesRegex(OepServerSideException, "insert failed"):
+            self._insert_advanced(commands, data, fail_inserts=2, fail_rollbacks=1)
+        # the session is closed after the failed rollback, the retry opens a new one.
+        # all sessions are closed in the end
+        self.assertEqual(
+            commands,
+            [
+                ("connection/open", None),
+                ("cursor/open", 1),
+                ("insert", 1),
+                ("connection/rollback", 1),
+                ("cursor/close", 1),
+                ("connection/close", 1),
+                ("connection/open", None),
+                ("cursor/open", 2),
+                ("insert", 2),
+                ("connection/rollback", 2),
+                ("cursor/close", 2),
+                ("connection/close", 2),
+            ],
+        )
+
+    def test_write_csv(self):
+        # NOTE: import inside of function, pandas is slow to import
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "i": [1, 2],
+                "f": [1.0, None],
+                "b": [True, False],
+                "s": ["a,b", None],
+                "d": pd.to_datetime(["2020-01-01 00:00:00", "2020-01-02 03:04:05"]),
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "data.csv")
+            write_csv(df, filepath)
+            with open(filepath, encoding="utf-8") as file:
+                text = file.read()
+        self.assertEqual(
+            text,
+            "i,f,b,s,d\n"
+            '1,1.0,True,"a,b",2020-01-01 00:00:00\n'
+            "2,,False,,2020-01-02 03:04:05\n",
+        )
+
+    def test_records_to_dataframe(self):
+        records = [{"a": {"x": 1}, "b": 1}, {"a": {"y": 2}, "b": None}]
+        df = records_to_dataframe(iter(records))
+        self.assertEqual(df["a"].tolist(), [{"x": 1}, {"y": 2}])
+        self.assertEqual(df["b"].tolist()[0], 1)
+
+    def test_dataframe_to_records(self):
+        import pandas as pd
+
+        df = pd.DataFrame({"a": [{"x": 1}, {"y": 2}], "b": [1, 2], "c": [1j, 2]})
+        records = dataframe_to_records(df)
+        self.assertEqual([r["a"] for r in records], [{"x": 1}, {"y": 2}])
+        self.assertEqual([r["b"] for r in records], [1, 2])
+
+    def test_read_csv_dates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "data.csv")
+            with open(filepath, "w", encoding="utf-8") as file:
+                file.write("a,d,t\n1,2020-01-01,2020-01-01T10:00:00\n")
+            records = [{"a": 1, "d": "2020-01-01", "t": "2020-01-01T10:00:00"}]
+            self.assertEqual(list(iter_records(filepath, 10)), [records])
+            df = read_dataframe(filepath)
+            self.assertEqual(df.astype(object).to_dict(orient="records"), records)
+
+    def test_iter_records_json(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "data.json")
+            invalid_filepath = os.path.join(tmpdir, "invalid.json")
+            with open(filepath, "w", encoding="utf-8") as file:
+                # default format of pandas' to_json
+                file.write('{"a": {"0": 1, "1": 2}}')
+            with open(invalid_filepath, "w", encoding="utf-8") as file:
+                file.write("[1, 2]")
+            records = list(iter_records(filepath, 10))
+            self.assertEqual(records, [[{"a": 1}, {"a": 2}]])
+            with self.assertRaises(OepClientSideException):
+                list(iter_records(invalid_filepath, 10))
+            # without ijson
+            with mock.patch.dict(sys.modules, {"ijson": None}):
+                records = list(iter_records(filepath, 10))
+                self.assertEqual(records, [[{"a": 1}, {"a": 2}]])
+                with self.assertRaises(OepClientSideException):
+                    list(iter_records(invalid_filepath, 10))
+
+    def test_iter_records_json_without_pandas(self):
+        # new interpreter: pandas is already imported by other tests
+        code = (
+            "import sys\n"
+            "from oep_client.utils import iter_records\n"
+            "assert list(iter_records(sys.argv[1], 2)) == [[{'a': 1}, {'a': 2}]]\n"
+            "assert 'pandas' not in sys.modules\n"
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "data.json")
+            with open(filepath, "w", encoding="utf-8") as file:
+                file.write('[{"a": 1}, {"a": 2}]')
+            # run next to the package, so it can be imported
+            cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            subprocess.run([sys.executable, "-c", code, filepath], check=True, cwd=cwd)
@@ -2,33 +2,109 @@
 """
 __version__ = "0.15.0"
 
+import codecs
+import csv
+import functools
+import importlib.util
+import itertools
 import json
 import logging
 import re
-from copy import deepcopy
+import shutil
+import sys
 from tempfile import NamedTemporaryFile
 from urllib.parse import urlsplit
 
-import pandas as pd
 import requests
-from numpy import nan
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from oep_client.exceptions import OepClientSideException
 
+try:
+    # NOTE: optional, but a lot faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # NOTE: optional fallback if orjson is not available
+    import ujson
+except ImportError:
+    ujson = None
+
 DEFAULT_INDENT = 2
+DEFAULT_ENCODING = "utf-8"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes
+DOWNLOAD_TIMEOUT = 60  # seconds
+FIX_NAME_PATTERN = re.compile("[^a-z0-9_]+")
+FIX_SUFFIX_PATTERN = re.compile("[^a-z0-9.]")
+URL_PATTERN = re.compile("^http[s]?://")
+# (frictionless) metadata types => data types for the table api:
+# "string" is no postgres type, and "double precision" is written as "float",
+# the type name the api uses (see DATA_TYPE_ALIASES in oep_client.py)
+DATA_TYPE_MAP = {"double precision": "float", "string": "varchar"}
+
+
+def json_dumps(data, indent=False):
+    """Serialize data into utf-8 encoded json.
+
+    Uses orjson or ujson if one of them is installed,
+    otherwise the standard library.
+
+    Args:
+        data(object): json serializable object
+        indent(bool, optional): pretty print with DEFAULT_INDENT
+
+    Returns:
+        bytes
+    """
+    if orjson:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if ujson:
+        indent = DEFAULT_INDENT if indent else 0
+        return ujson.dumps(data, indent=indent, ensure_ascii=False).encode()
+    indent = DEFAULT_INDENT if indent else None
+    return json.dumps(data, indent=indent, ensure_ascii=False).encode()
+
+
+def json_loads(data):
+    """Parse json from bytes or str.
+
+    Uses orjson or ujson if one of them is installed,
+    otherwise the standard library.
+    """
+    if orjson:
+        return orjson.loads(data)
+    if ujson:
+        return ujson.loads(data)
+    return json.loads(data)
 
 
 def read_json(filepath, encoding):
 
-    filepath = make_local(filepath)
-
-    with open(filepath, encoding=encoding) as file:
-        return json.load(file)
+    if URL_PATTERN.match(filepath):
+        # parse the downloaded bytes directly, no need for a temporary file
+        resp = get_download_session().get(filepath, timeout=DOWNLOAD_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.content
+    else:
+        with open(filepath, "rb") as file:
+            data = file.read()
+    if encoding and codecs.lookup(encoding).name != "utf-8":
+        data = data.decode(encoding)
+    return json_loads(data)
 
 
 def write_json(data, filepath, encoding):
-    with open(filepath, "w", encoding=encoding) as file:
-        json.dump(data, file, indent=DEFAULT_INDENT, ensure_ascii=False)
+    data = json_dumps(data, indent=True)
+    if encoding and codecs.lookup(encoding).name != "utf-8":
+        data = data.decode().encode(encoding)
+    with open(filepath, "wb") as file:
+        file.write(data)
 
 
 def read_metadata_json(filepath, encoding):
@@ -42,86 +118,545 @@ def get_schema_definition_from_metadata(meta):
     return definition
 
 
+@functools.lru_cache(maxsize=4096)
 def fix_name(name):
-    name_new = re.sub("[^a-z0-9_]+", "_", name.lower())
+    name_new = FIX_NAME_PATTERN.sub("_", name.lower())
     if name_new != name:
         logging.warning('Changed name "%s" to "%s"', name, name_new)
     return name_new
 
 
+def is_dataframe(data):
+    """Check if data is a DataFrame, without importing pandas."""
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+
 def dataframe_to_records(df):
-    columns = [fix_name(n) for n in df.columns]
-    # replace nan
-    df = df.replace({nan: None})
-    data = df.values.tolist()
-    data = [dict(zip(columns, row)) for row in data]
-    return data
+    """Convert DataFrame into list of records.
+
+    Uses pyarrow if it is installed: the records are created from the
+    arrow columns without boxing every cell in pandas first.
+    """
+    fields = [fix_name(n) for n in df.columns]
+    try:
+        # NOTE: import inside of function because it's not mandatory
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+
+    if pa:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except pa.ArrowException:
+            # e.g. mixed types or complex numbers in object columns
+            table = None
+        # NOTE: dicts would become structs / maps: every record would get
+        # the keys of all rows, so these are converted column-wise
+        if table is not None and not any(
+            pa.types.is_struct(f.type) or pa.types.is_map(f.type) for f in table.schema
+        ):
+            return table.rename_columns(fields).to_pylist()
+
+    fields, values = dataframe_to_fields_values(df)
+    return [dict(zip(fields, row)) for row in values]
+
+
+def dataframe_to_fields_values(df):
+    """Convert DataFrame into column names and list of row values.
+
+    Unlike records, the column names are not repeated in every row.
+
+    Returns:
+        tuple(fields, values)
+    """
+    fields = [fix_name(n) for n in df.columns]
+    # convert column by column: no upcast of the whole frame to one object array.
+    columns = []
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if column.hasnans:
+            # nan => None in the same pass as the conversion to python objects
+            column = column.to_numpy(dtype=object, na_value=None)
+        columns.append(column.tolist())
+    # rows as tuples (serialized as json arrays)
+    values = list(zip(*columns))
+    return fields, values
+
+
+def get_fields_values(records):
+    """Convert records into column names and list of row values.
+
+    Missing values are set to None.
+
+    Returns:
+        tuple(fields, values)
+    """
+    first = tuple(records[0]) if records else ()
+    if all(tuple(rec) == first for rec in records):
+        # common case (e.g. records from a DataFrame): same keys in same order
+        return list(first), [list(rec.values()) for rec in records]
+
+    # union of all keys, in order of first occurrence
+    fields = list(dict.fromkeys(f for rec in records for f in rec))
+    values = [[rec.get(f) for f in fields] for rec in records]
+    return fields, values
 
 
 def records_to_dataframe(records):
-    df = pd.DataFrame(records)
-    return df
+    """Create DataFrame from records.
+
+    Uses pyarrow if it is installed: columns and types are determined
+    in C++ instead of by pandas in python. Not for nested values (e.g. json
+    columns), which arrow would turn into structs with all keys.
+    """
+    # NOTE: import inside of function, pandas is slow to import
+    import pandas as pd
+
+    try:
+        # NOTE: import inside of function because it's not mandatory
+        import pyarrow as pa
+    except ImportError:
+        return pd.DataFrame(records)
+
+    records = list(records)
+    try:
+        table = pa.Table.from_pylist(records)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. mixed types
+        table = None
+    # arrow only uses the keys of the first record
+    fields = list(dict.fromkeys(f for rec in records for f in rec))
+    if (
+        table is None
+        or table.column_names != fields
+        or any(pa.types.is_nested(f.type) for f in table.schema)
+    ):
+        return pd.DataFrame(records)
+    return table.to_pandas()
+
+
+def create_session(pool_maxsize=1):
+    """Create http session that keeps connections alive between requests.
+
+    Args:
+        pool_maxsize(int, optional): maximum number of connections per host
+
+    Returns:
+        requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            # only retry reads: writes (e.g. create table) must not be sent twice
+            allowed_methods=["GET", "HEAD"],
+            # return the last response, so the client raises its own exceptions
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@functools.lru_cache(maxsize=None)
+def get_download_session():
+    """Shared session for downloading remote files."""
+    return create_session()
 
 
 def make_local(filepath_or_url: str) -> str:
     # if filepath is url: download to tempfile
-    if not re.match("^http[s]?://", filepath_or_url):
+    if not URL_PATTERN.match(filepath_or_url):
         return filepath_or_url
     suffix = urlsplit(filepath_or_url).path.split("/")[-1]
-    suffix = re.sub("[^a-z0-9.]", "_", suffix.lower())  # replace non word chars
+    suffix = FIX_SUFFIX_PATTERN.sub("_", suffix.lower())  # replace non word chars
     with NamedTemporaryFile(mode="wb", delete=False, suffix="_" + suffix) as file:
         logging.debug(f"Downloading {filepath_or_url} => {file.name}")
-        resp = requests.get(filepath_or_url)
-        resp.raise_for_status()
-        file.write(resp.content)
+        # stream to disk instead of holding the whole file in memory
+        session = get_download_session()
+        with session.get(filepath_or_url, stream=True) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            shutil.copyfileobj(resp.raw, file, length=DOWNLOAD_CHUNK_SIZE)
         return file.name
 
 
+def read_csv(filepath, encoding=None, delimiter=None, usecols=None):
+    """Read csv file into DataFrame.
+
+    Uses the multithreaded csv reader of pyarrow if it is installed,
+    otherwise pandas.
+
+    Args:
+        usecols(list, optional): only read these columns
+    """
+    # NOTE: import inside of function, pandas is slow to import
+    import pandas as pd
+
+    if not importlib.util.find_spec("pyarrow"):
+        return pd.read_csv(
+            filepath, encoding=encoding, sep=delimiter, usecols=usecols, engine="c"
+        )
+    table = read_csv_table(
+        filepath, encoding=encoding, delimiter=delimiter, usecols=usecols
+    )
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def read_csv_table(filepath, encoding=None, delimiter=None, usecols=None):
+    """Read csv file into pyarrow Table (requires pyarrow).
+
+    Dates and times are kept as strings, see get_csv_string_types.
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import pyarrow.csv as pa_csv
+
+    column_types = get_csv_string_types(filepath, encoding, delimiter, usecols)
+    return pa_csv.read_csv(
+        filepath, **get_csv_options(encoding, delimiter, usecols, column_types)
+    )
+
+
+def get_csv_options(encoding=None, delimiter=None, usecols=None, column_types=None):
+    """Return options for the csv reader of pyarrow (requires pyarrow).
+
+    Args:
+        column_types(dict, optional): column_name -> pyarrow type
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import pyarrow.csv as pa_csv
+
+    return {
+        "read_options": pa_csv.ReadOptions(encoding=encoding or "utf8"),
+        "parse_options": pa_csv.ParseOptions(delimiter=delimiter or ","),
+        # NOTE: default null_values ("", "NA", "NaN", "null", ...) like pandas
+        "convert_options": pa_csv.ConvertOptions(
+            strings_can_be_null=True,
+            include_columns=list(usecols or []),
+            column_types=column_types,
+        ),
+    }
+
+
+def get_csv_string_types(filepath, encoding=None, delimiter=None, usecols=None):
+    """Return column types to keep dates and times as strings (requires pyarrow).
+
+    pyarrow would infer them as date / timestamp columns (pandas keeps strings),
+    which are not json serializable without orjson.
+
+    Returns:
+        dict: column_name -> pyarrow string type
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # the streaming reader only infers the types from the first block
+    reader = pa_csv.open_csv(filepath, **get_csv_options(encoding, delimiter, usecols))
+    reader.close()
+    return {
+        field.name: pa.string()
+        for field in reader.schema
+        if pa.types.is_temporal(field.type)
+    }
+
+
+def open_csv_reader(filepath, encoding=None, delimiter=None, usecols=None):
+    """Open streaming csv reader of pyarrow (requires pyarrow).
+
+    Dates and times are kept as strings, see get_csv_string_types.
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import pyarrow.csv as pa_csv
+
+    column_types = get_csv_string_types(filepath, encoding, delimiter, usecols)
+    return pa_csv.open_csv(
+        filepath, **get_csv_options(encoding, delimiter, usecols, column_types)
+    )
+
+
+def iter_csv_records_arrow(
+    filepath, chunksize, encoding=None, delimiter=None, usecols=None
+):
+    """Read records from csv file in chunks with the streaming reader of pyarrow.
+
+    NOTE: column types are inferred from the first block of the file.
+    If later rows do not match, pyarrow.ArrowInvalid is raised.
+    """
+    # NOTE: import inside of function because it's not mandatory
+    import pyarrow as pa
+
+    reader = open_csv_reader(filepath, encoding, delimiter, usecols)
+    names = [fix_name(n) for n in reader.schema.names]
+    # record batches from the reader are re-batched to chunksize
+    pending = []
+    n_pending = 0
+    for batch in reader:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        if n_pending < chunksize:
+            continue
+        table = pa.Table.from_batches(pending).rename_columns(names)
+        i_from = 0
+        while n_pending - i_from >= chunksize:
+            yield table.slice(i_from, chunksize).to_pylist()
+            i_from += chunksize
+        pending = table.slice(i_from).to_batches()
+        n_pending -= i_from
+    if n_pending:
+        yield pa.Table.from_batches(pending).rename_columns(names).to_pylist()
+
+
+def iter_csv_records_pandas(
+    filepath, chunksize, encoding=None, delimiter=None, usecols=None, skip=0
+):
+    """Read records from csv file in chunks with pandas.
+
+    Args:
+        skip(int, optional): number of records to skip
+    """
+    # NOTE: import inside of function, pandas is slow to import
+    import pandas as pd
+
+    chunks = pd.read_csv(
+        filepath,
+        encoding=encoding,
+        sep=delimiter or ",",
+        usecols=usecols,
+        engine="c",
+        chunksize=chunksize,
+    )
+    for df in chunks:
+        if skip:
+            n_skip = min(skip, len(df))
+            df = df.iloc[n_skip:]
+            skip -= n_skip
+            if df.empty:
+                continue
+        yield dataframe_to_records(df)
+
+
+def write_csv(df, filepath, encoding=None, delimiter=None):
+    """Write DataFrame into csv file.
+
+    NOTE: pyarrow's csv writer is faster, but its output differs from pandas
+    (quoted strings and header, true/false, floats without decimals, ...)
+    """
+    df.to_csv(filepath, encoding=encoding, sep=delimiter or ",", na_rep="", index=False)
+
+
+@functools.lru_cache(maxsize=None)
+def get_excel_engine():
+    """Return the fastest available engine for pd.read_excel."""
+    # NOTE: import inside of function, pandas is slow to import
+    import pandas as pd
+
+    pandas_version = tuple(int(v) for v in pd.__version__.split(".")[:2])
+    # calamine engine is supported since pandas 2.2
+    if pandas_version >= (2, 2) and importlib.util.find_spec("python_calamine"):
+        # rust based reader, a lot faster than openpyxl
+        return "calamine"
+    # pandas opens the workbook in read only mode
+    return "openpyxl"
+
+
+def write_records_csv(records, filepath, encoding=DEFAULT_ENCODING, delimiter=None):
+    """Write records into csv file row by row.
+
+    Unlike write_csv, records can be an iterator and are never all
+    in memory at once.
+
+    Args:
+        records(iterable): records(dict: column_name -> value),
+            the first record determines the columns
+        filepath(str): path of csv file
+    """
+    records = iter(records)
+    first = next(records, None)
+    with open(filepath, "w", encoding=encoding or DEFAULT_ENCODING, newline="") as file:
+        if first is None:
+            return
+        writer = csv.DictWriter(
+            file,
+            fieldnames=list(first),
+            delimiter=delimiter or ",",
+            lineterminator="\n",
+        )
+        writer.writeheader()
+        writer.writerow(first)
+        writer.writerows(records)
+
+
 def read_dataframe(filepath, **kwargs):
+    # NOTE: import inside of function, pandas is slow to import
+    import pandas as pd
 
     filepath = make_local(filepath)
 
     if filepath.endswith(".json"):
         df = pd.read_json(filepath)
     elif filepath.endswith(".csv"):
-        df = pd.read_csv(
-            filepath, encoding=kwargs.get("encoding"), sep=kwargs.get("delimiter")
+        df = read_csv(
+            filepath,
+            encoding=kwargs.get("encoding"),
+            delimiter=kwargs.get("delimiter"),
+            usecols=kwargs.get("usecols"),
         )
     elif filepath.endswith(".xlsx"):
         # pd.read_excel default for sheet_name = 0 (first sheet)
-        sheet = kwargs.get("sheet", 0)
-        df = pd.read_excel(filepath, sheet)
+        sheet = kwargs.get("sheet") or 0
+        df = pd.read_excel(filepath, sheet_name=sheet, engine=get_excel_engine())
+    elif filepath.endswith(".parquet"):
+        # requires pyarrow. smaller files than feather
+        df = pd.read_parquet(filepath)
+    elif filepath.endswith(".feather") or filepath.endswith(".arrow"):
+        # requires pyarrow. fastest for local round trips
+        df = pd.read_feather(filepath)
     else:
         raise OepClientSideException("Unsupported filetype: %s" % filepath)
     return df
 
 
+def fix_record_names(records):
+    """Fix the column names in a list of records (e.g. parsed from json)."""
+    result = []
+    for rec in records:
+        if not isinstance(rec, dict):
+            raise OepClientSideException(
+                "Records must be objects (column_name -> value), not: %r" % (rec,)
+            )
+        result.append({fix_name(k): v for k, v in rec.items()})
+    return result
+
+
+def iter_records(filepath, chunksize, **kwargs):
+    """Read records from file in chunks, so that large files do not have
+    to be loaded into memory at once.
+
+    csv files are streamed with pyarrow (without creating a DataFrame) or read
+    with pandas in chunks, json files with an array of records are parsed
+    incrementally if ijson is installed (otherwise without pandas).
+    Other file types are read completely and then split up.
+
+    Args:
+        filepath(str): path or url of data file
+        chunksize(int): maximum number of records per chunk.
+            if 0 or None: all records in one chunk
+
+    Yields:
+        list of records(dict: column_name -> value)
+    """
+    chunksize = chunksize or sys.maxsize
+    filepath = make_local(filepath)
+
+    if filepath.endswith(".csv"):
+        csv_kwargs = {
+            "encoding": kwargs.get("encoding"),
+            "delimiter": kwargs.get("delimiter"),
+            "usecols": kwargs.get("usecols"),
+        }
+        n_done = 0
+        if importlib.util.find_spec("pyarrow"):
+            # NOTE: import inside of function because it's not mandatory
+            import pyarrow as pa
+
+            # no DataFrame: records are created directly from the arrow columns
+            try:
+                for records in iter_csv_records_arrow(
+                    filepath, chunksize, **csv_kwargs
+                ):
+                    yield records
+                    n_done += len(records)
+                return
+            except pa.ArrowInvalid as exc:
+                # types inferred from the beginning of the file do not fit
+                logging.debug("Continue reading csv with pandas: %s", exc)
+        yield from iter_csv_records_pandas(
+            filepath, chunksize, skip=n_done, **csv_kwargs
+        )
+        return
+
+    if filepath.endswith(".json"):
+        try:
+            # NOTE: import inside of function because it's not mandatory
+            import ijson
+        except ImportError:
+            ijson = None
+        if ijson:
+            with open(filepath, "rb") as file:
+                # only a top-level array of records can be read incrementally
+                _, event, _ = next(ijson.parse(file), (None, None, None))
+                file.seek(0)
+                if event == "start_array":
+                    items = ijson.items(file, "item", use_float=True)
+                    while True:
+                        records = list(itertools.islice(items, chunksize))
+                        if not records:
+                            return
+                        yield fix_record_names(records)
+            # e.g. the default format of pandas' to_json: {column: {index: value}}
+            records = dataframe_to_records(read_dataframe(filepath, **kwargs))
+        else:
+            # parse at once (orjson if installed): no need for a DataFrame either
+            data = read_json(filepath, kwargs.get("encoding"))
+            if isinstance(data, list):
+                records = fix_record_names(data)
+            else:
+                records = dataframe_to_records(read_dataframe(filepath, **kwargs))
+    else:
+        records = dataframe_to_records(read_dataframe(filepath, **kwargs))
+    for i_from in range(0, len(records), chunksize):
+        yield records[i_from : i_from + chunksize]
+
+
 def write_dataframe(df, filepath, **kwargs):
     if filepath.endswith(".json"):
-        df.to_json(filepath, orient="records", indent=DEFAULT_INDENT, force_ascii=False)
+        fields = list(df.columns)
+        values = df.to_numpy(dtype=object, na_value=None).tolist()
+        try:
+            data = json_dumps([dict(zip(fields, row)) for row in values], indent=True)
+        except TypeError:
+            # e.g. timestamps: let pandas convert them
+            df.to_json(
+                filepath, orient="records", indent=DEFAULT_INDENT, force_ascii=False
+            )
+        else:
+            with open(filepath, "wb") as file:
+                file.write(data)
     elif filepath.endswith(".csv"):
-        df.to_csv(
+        write_csv(
+            df,
             filepath,
             encoding=kwargs.get("encoding"),
-            sep=kwargs.get("delimiter"),
-            index=False,
+            delimiter=kwargs.get("delimiter"),
         )
     elif filepath.endswith(".xlsx"):
         sheet = kwargs.get("sheet")
         if not sheet:
             raise OepClientSideException("Must specify sheet when reading excel files")
-        df.to_excel(filepath, sheet, index=False)
+        # xlsxwriter is faster and needs less memory than openpyxl
+        engine = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else None
+        df.to_excel(filepath, sheet_name=sheet, index=False, engine=engine)
+    elif filepath.endswith(".parquet"):
+        df.to_parquet(filepath, compression="snappy", index=False)
+    elif filepath.endswith(".feather") or filepath.endswith(".arrow"):
+        df.to_feather(filepath, compression="lz4")
     elif filepath == "-":
-        # stdout
-        s = df.to_string(index=False)
-        print(s)
+        # stdout: csv can be written incrementally (unlike to_string)
+        df.to_csv(sys.stdout, sep=kwargs.get("delimiter") or ",", index=False)
     else:
         raise OepClientSideException("Unsupported filetype: %s" % filepath)
     return df
 
 
 def fix_table_definition(definition):
-    definition = deepcopy(definition)
+    # only top level keys and the columns are changed: shallow copies are enough
+    definition = dict(definition)
     if "fields" in definition:
         definition["columns"] = definition.pop("fields")
     definition["columns"] = [fix_column_definition(c) for c in definition["columns"]]
@@ -129,6 +664,7 @@ def fix_table_definition(definition):
 
 
 def fix_column_definition(definition):
-    definition = deepcopy(definition)
-    definition["data_type"] = definition.get("data_type") or definition.pop("type")
+    definition = dict(definition)
+    data_type = definition.get("data_type") or definition.pop("type")
+    definition["data_type"] = DATA_TYPE_MAP.get(data_type.strip().lower(), data_type)
     return definition
@@ -15,11 +15,17 @@ setup(
     url="https://github.com/wingechr/oep-client",
     install_requires=[
         "requests",
-        "pandas",
+        "pandas>=1.5",
         "click",
         # "sqlalchemy",
         # "oedialect",
     ],
+    extras_require={
+        # optional packages for better performance
+        "fast": ["orjson", "ijson"],
+        "arrow": ["pyarrow"],
+        "http2": ["httpx[http2]"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",